@@ -0,0 +1,181 @@
+import json
+import mmap
+import os
+import stat
+import struct
+import tempfile
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+from skill_taxonomy import SkillTaxonomy, load_taxonomy
+
+# File layout (every integer is little endian):
+#   header      MAGIC, version, doc count, term count, then (offset, length) of each section
+#   meta        JSON list of resume metadata (everything except 'content')
+#   vocab       JSON object: fingerprint of the skill taxonomy used and the list of terms
+#               (canonical skills), the position of a term is its term ID
+#   doc index   per document: text start, text end (uint64) and term start, term end (uint64)
+#   doc terms   uint32 term IDs, sorted and unique per document
+#   text        lowercased resume text, UTF-8, concatenated
+MAGIC = b'RMCS'
+VERSION = 2
+SECTIONS = ('meta', 'vocab', 'index', 'terms', 'text')
+HEADER = struct.Struct('<4sIII' + 'QQ' * len(SECTIONS))
+INDEX_ENTRY = struct.Struct('<QQQQ')
+TERM_ID = struct.Struct('<I')
+
+
+def write_snapshot(path: str, resumes: Iterable[Dict[str, Any]],
+                   taxonomy: Optional[SkillTaxonomy] = None) -> int:
+    """Write a corpus snapshot for the given resumes and atomically replace path.
+
+    The terms of a document are the taxonomy skills found in it, so scoring can
+    use them instead of matching the text against the taxonomy again.
+    Returns the number of documents written.
+    """
+    if taxonomy is None:
+        taxonomy = load_taxonomy()
+
+    meta: List[Dict[str, Any]] = []
+    texts: List[bytes] = []
+    doc_terms: List[List[str]] = []
+    vocab: Dict[str, int] = {}
+
+    for resume in resumes:
+        text_lower = (resume.get('content') or '').lower()
+        terms = sorted(taxonomy.find_skills(text_lower))
+        for term in terms:
+            vocab.setdefault(term, len(vocab))
+        meta.append({key: value for key, value in resume.items() if key != 'content'})
+        texts.append(text_lower.encode('utf-8'))
+        doc_terms.append(terms)
+
+    index = bytearray()
+    term_ids = bytearray()
+    term_count = 0
+    text_pos = 0
+    for text, terms in zip(texts, doc_terms):
+        term_start = term_count
+        for term_id in sorted(vocab[term] for term in terms):
+            term_ids += TERM_ID.pack(term_id)
+        term_count += len(terms)
+        index += INDEX_ENTRY.pack(text_pos, text_pos + len(text), term_start, term_count)
+        text_pos += len(text)
+
+    sections = {
+        'meta': json.dumps(meta).encode('utf-8'),
+        'vocab': json.dumps({'taxonomy': taxonomy.fingerprint, 'terms': list(vocab)}).encode('utf-8'),
+        'index': bytes(index),
+        'terms': bytes(term_ids),
+        'text': b''.join(texts)
+    }
+
+    offsets: List[int] = []
+    position = HEADER.size
+    for name in SECTIONS:
+        offsets.extend((position, len(sections[name])))
+        position += len(sections[name])
+
+    # Write next to the target and rename over it, so readers never see a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(meta), len(vocab), *offsets))
+            for name in SECTIONS:
+                f.write(sections[name])
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the target's mode so other users can still map it
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return len(meta)
+
+
+class CorpusSnapshot:
+    """Read-only, memory-mapped view of a corpus snapshot.
+
+    The text and term sections are never copied as a whole; processes that open
+    the same file share its pages through the OS page cache. A snapshot that is
+    replaced while open keeps serving the version that was mapped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self._mmap, 0)
+        magic, version, self.doc_count, self.term_count = header[:4]
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a corpus snapshot (version {VERSION}): {path}")
+
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        for i, name in enumerate(SECTIONS):
+            self._sections[name] = (header[4 + i * 2], header[5 + i * 2])
+
+        self.metadata: List[Dict[str, Any]] = json.loads(self._section_bytes('meta'))
+        vocab = json.loads(self._section_bytes('vocab'))
+        # Fingerprint of the skill taxonomy the document terms were computed with
+        self.taxonomy_fingerprint: str = vocab['taxonomy']
+        self._vocab: List[str] = vocab['terms']
+        self._text_offset = self._sections['text'][0]
+        self._index_offset = self._sections['index'][0]
+        self._terms_offset = self._sections['terms'][0]
+
+    def _section_slice(self, name: str) -> slice:
+        offset, length = self._sections[name]
+        return slice(offset, offset + length)
+
+    def _section_bytes(self, name: str) -> bytes:
+        return self._mmap[self._section_slice(name)]
+
+    def _index_entry(self, doc: int) -> Tuple[int, int, int, int]:
+        if not 0 <= doc < self.doc_count:
+            raise IndexError(doc)
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + doc * INDEX_ENTRY.size)
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def resume(self, doc: int) -> Dict[str, Any]:
+        """Resume metadata (without content) for a document"""
+        return self.metadata[doc]
+
+    def text(self, doc: int) -> str:
+        """Lowercased text of a document"""
+        start, end, _, _ = self._index_entry(doc)
+        return self._mmap[self._text_offset + start:self._text_offset + end].decode('utf-8')
+
+    def term_ids(self, doc: int) -> List[int]:
+        """Sorted, unique term IDs of a document"""
+        _, _, start, end = self._index_entry(doc)
+        return list(struct.unpack_from(f'<{end - start}I', self._mmap, self._terms_offset + start * TERM_ID.size))
+
+    def term(self, term_id: int) -> str:
+        """Term for a term ID"""
+        return self._vocab[term_id]
+
+    def skills(self, doc: int) -> Set[str]:
+        """Canonical taxonomy skills found in a document"""
+        return {self._vocab[term_id] for term_id in self.term_ids(doc)}
+
+    def close(self) -> None:
+        """Release the memory map"""
+        self._mmap.close()
+
+    def __enter__(self) -> 'CorpusSnapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,8 +1,60 @@
 import sqlite3
 import json
 import os
+import time
+import hashlib
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Deque
+from corpus_snapshot import write_snapshot
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.doc')
+
+# Per-process state for bulk import workers, set by _init_import_worker
+_import_parser = None
+_import_existing_ids: set = set()
+
+def _init_import_worker(existing_ids: set) -> None:
+    """Give each import worker the ids already in the database"""
+    global _import_existing_ids
+    _import_existing_ids = existing_ids
+
+def _extract_import_item(item: Tuple[str, str, str]) -> Dict[str, Any]:
+    """Hash one bulk import file and extract its text unless it was already imported.
+    
+    item is (path to read, path to record, file name). Returns the resume to insert,
+    {'status': 'Skipped', 'id': ...} for a known file, or {'status': 'Error', ...}.
+    """
+    global _import_parser
+    read_path, file_path, file_name = item
+    try:
+        with open(read_path, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        resume_id = f"import_{content_hash[:16]}"
+        if resume_id in _import_existing_ids:
+            return {'id': resume_id, 'filePath': file_path, 'status': 'Skipped'}
+        
+        if _import_parser is None:
+            # Imported lazily so that only import workers load the NLP dependencies
+            from resume_parser import ResumeParser
+            _import_parser = ResumeParser()
+        content = _import_parser.extract_text_from_file(read_path)
+    except Exception as e:
+        return {'filePath': file_path, 'status': 'Error', 'error': str(e)}
+    
+    return {
+        'id': resume_id,
+        'fileName': file_name,
+        'filePath': file_path,
+        'content': content,
+        'source': 'Import',
+        'createdAt': datetime.now().isoformat(),
+        'processedAt': datetime.now().isoformat(),
+        'status': 'Processed' if content else 'Failed'
+    }
 
 class DBSource:
     def __init__(self, db_path: str = "resumes.db"):
@@ -29,6 +81,23 @@ class DBSource:
                 )
             ''')
             
+            # Create corpus metadata table (corpus version is bumped on every resume change)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS corpus_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute("INSERT OR IGNORE INTO corpus_meta (key, value) VALUES ('corpusVersion', 0)")
+            
+            # Corpus version at which each resume was last added or updated
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS resume_changes (
+                    resumeId TEXT PRIMARY KEY,
+                    corpusVersion INTEGER NOT NULL
+                )
+            ''')
+            
             # Create sample data if table is empty
             cursor.execute("SELECT COUNT(*) FROM resumes")
             if cursor.fetchone()[0] == 0:
@@ -50,7 +119,8 @@ class DBSource:
                 'content': 'John Doe\nSoftware Engineer\n5 years experience in C#, .NET, SQL Server\nSkills: C#, .NET, SQL Server, JavaScript, React',
                 'source': 'Database',
                 'createdAt': datetime.now().isoformat(),
-                'status': 'Pending'
+                'processedAt': datetime.now().isoformat(),
+                'status': 'Processed'
             },
             {
                 'id': 'db_002',
@@ -59,7 +129,8 @@ class DBSource:
                 'content': 'Jane Smith\nSenior Developer\n8 years experience in Python, Django, PostgreSQL\nSkills: Python, Django, PostgreSQL, Docker, AWS',
                 'source': 'Database',
                 'createdAt': datetime.now().isoformat(),
-                'status': 'Pending'
+                'processedAt': datetime.now().isoformat(),
+                'status': 'Processed'
             },
             {
                 'id': 'db_003',
@@ -68,14 +139,15 @@ class DBSource:
                 'content': 'Mike Johnson\nFull Stack Developer\n6 years experience in Java, Spring, MySQL\nSkills: Java, Spring, MySQL, Angular, Git',
                 'source': 'Database',
                 'createdAt': datetime.now().isoformat(),
-                'status': 'Pending'
+                'processedAt': datetime.now().isoformat(),
+                'status': 'Processed'
             }
         ]
         
         for resume in sample_resumes:
             cursor.execute('''
-                INSERT INTO resumes (id, fileName, filePath, content, source, createdAt, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO resumes (id, fileName, filePath, content, source, createdAt, processedAt, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 resume['id'],
                 resume['fileName'],
@@ -83,11 +155,12 @@ class DBSource:
                 resume['content'],
                 resume['source'],
                 resume['createdAt'],
+                resume['processedAt'],
                 resume['status']
             ))
     
-    def fetch_resumes_from_database(self) -> List[Dict[str, Any]]:
-        """Fetch all resumes from the database"""
+    def fetch_resumes_from_database(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fetch all resumes from the database, optionally only those with a given status"""
         resumes = []
         
         try:
@@ -97,8 +170,9 @@ class DBSource:
             cursor.execute('''
                 SELECT id, fileName, filePath, content, source, createdAt, processedAt, status
                 FROM resumes
+                WHERE ? IS NULL OR status = ?
                 ORDER BY createdAt DESC
-            ''')
+            ''', (status, status))
             
             rows = cursor.fetchall()
             
@@ -140,6 +214,7 @@ class DBSource:
                 resume_data.get('createdAt', datetime.now().isoformat()),
                 resume_data.get('status', 'Pending')
             ))
+            self.bump_corpus_version(cursor, resume_data.get('id'))
             
             conn.commit()
             conn.close()
@@ -168,6 +243,9 @@ class DBSource:
                     WHERE id = ?
                 ''', (status, datetime.now().isoformat(), resume_id))
             
+            if cursor.rowcount > 0:
+                self.bump_corpus_version(cursor, resume_id)
+            
             conn.commit()
             conn.close()
             return True
@@ -176,8 +254,332 @@ class DBSource:
             print(f"Error updating resume status: {e}")
             return False
 
+    def resume_exists(self, resume_id: str) -> bool:
+        """Check whether a resume with the given id is already stored"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM resumes WHERE id = ?", (resume_id,))
+            exists = cursor.fetchone() is not None
+            conn.close()
+            return exists
+            
+        except Exception as e:
+            print(f"Error checking resume {resume_id}: {e}")
+            return False
+    
+    def bump_corpus_version(self, cursor: sqlite3.Cursor, resume_id: Optional[str] = None) -> None:
+        """Increment the corpus version within the caller's transaction, recording the changed resume"""
+        cursor.execute("UPDATE corpus_meta SET value = value + 1 WHERE key = 'corpusVersion'")
+        if resume_id is not None:
+            cursor.execute('''
+                INSERT OR REPLACE INTO resume_changes (resumeId, corpusVersion)
+                SELECT ?, value FROM corpus_meta WHERE key = 'corpusVersion'
+            ''', (resume_id,))
+    
+    def get_corpus_version(self) -> int:
+        """Current corpus version, used to invalidate cached rankings (-1 if unknown)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM corpus_meta WHERE key = 'corpusVersion'")
+            row = cursor.fetchone()
+            conn.close()
+            return row[0] if row else 0
+            
+        except Exception as e:
+            print(f"Error reading corpus version: {e}")
+            return -1
+    
+    def fetch_resumes_changed_since(self, corpus_version: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Fetch resumes added or updated after corpus_version (-1 for all), with the current corpus version"""
+        resumes = []
+        current_version = -1
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            # Read both in one transaction so the version matches the returned rows
+            cursor.execute("BEGIN")
+            cursor.execute("SELECT value FROM corpus_meta WHERE key = 'corpusVersion'")
+            current_version = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT r.id, r.fileName, r.filePath, r.content, r.source, r.createdAt, r.processedAt, r.status
+                FROM resumes r
+                LEFT JOIN resume_changes c ON c.resumeId = r.id
+                WHERE COALESCE(c.corpusVersion, 0) > ?
+                ORDER BY r.createdAt DESC
+            ''', (corpus_version,))
+            
+            for row in cursor.fetchall():
+                resumes.append({
+                    'id': row[0],
+                    'fileName': row[1],
+                    'filePath': row[2],
+                    'content': row[3],
+                    'source': row[4],
+                    'createdAt': row[5],
+                    'processedAt': row[6],
+                    'status': row[7]
+                })
+            
+            conn.rollback()
+            conn.close()
+            
+        except Exception as e:
+            print(f"Error fetching changed resumes from database: {e}")
+            return [], -1
+        
+        return resumes, current_version
+    
+    def fetch_pending_resumes(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Fetch the oldest resumes that have not been processed yet"""
+        resumes = []
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id, fileName, filePath, content, source, createdAt, processedAt, status
+                FROM resumes
+                WHERE status = 'Pending'
+                ORDER BY createdAt ASC
+                LIMIT ?
+            ''', (limit,))
+            
+            for row in cursor.fetchall():
+                resumes.append({
+                    'id': row[0],
+                    'fileName': row[1],
+                    'filePath': row[2],
+                    'content': row[3],
+                    'source': row[4],
+                    'createdAt': row[5],
+                    'processedAt': row[6],
+                    'status': row[7]
+                })
+            
+            conn.close()
+            
+        except Exception as e:
+            print(f"Error fetching pending resumes from database: {e}")
+        
+        return resumes
+    
+    def count_resumes_by_status(self) -> Dict[str, int]:
+        """Number of resumes per status"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT status, COUNT(*) FROM resumes GROUP BY status")
+            counts = {row[0]: row[1] for row in cursor.fetchall()}
+            conn.close()
+            return counts
+            
+        except Exception as e:
+            print(f"Error counting resumes: {e}")
+            return {}
+    
+    def add_resumes_to_database(self, resumes: List[Dict[str, Any]]) -> List[str]:
+        """Add many resumes in a single transaction, skipping ids that already exist.
+        
+        Returns the ids that were actually inserted, in order.
+        """
+        if not resumes:
+            return []
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            # Row by row within the one transaction, to know which ids were actually inserted
+            inserted_ids = []
+            for resume_data in resumes:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO resumes (id, fileName, filePath, content, source, createdAt, processedAt, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    resume_data.get('id'),
+                    resume_data.get('fileName'),
+                    resume_data.get('filePath'),
+                    resume_data.get('content'),
+                    resume_data.get('source', 'Database'),
+                    resume_data.get('createdAt', datetime.now().isoformat()),
+                    resume_data.get('processedAt'),
+                    resume_data.get('status', 'Pending')
+                ))
+                if cursor.rowcount > 0:
+                    inserted_ids.append(resume_data.get('id'))
+            
+            if inserted_ids:
+                self.bump_corpus_version(cursor)
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO resume_changes (resumeId, corpusVersion)
+                    SELECT ?, value FROM corpus_meta WHERE key = 'corpusVersion'
+                ''', [(resume_id,) for resume_id in inserted_ids])
+            
+            conn.commit()
+            conn.close()
+            return inserted_ids
+            
+        except Exception as e:
+            print(f"Error adding resumes to database: {e}")
+            return []
+    
+    def fetch_resume_ids(self, prefix: str = '') -> set:
+        """Fetch the ids of all stored resumes, optionally only those with a prefix"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM resumes WHERE substr(id, 1, ?) = ?", (len(prefix), prefix))
+            ids = {row[0] for row in cursor.fetchall()}
+            conn.close()
+            return ids
+            
+        except Exception as e:
+            print(f"Error fetching resume ids: {e}")
+            return set()
+    
+    def find_import_files(self, import_path: str, staging_dir: str) -> Iterator[Tuple[str, str, str]]:
+        """Yield (path to read, path to record, file name) for every resume file under import_path.
+        
+        Zip members are decompressed once, into staging_dir, while the archive is open.
+        A member that cannot be read is yielded with an empty path to read.
+        """
+        if not zipfile.is_zipfile(import_path):
+            for root, _, files in os.walk(import_path):
+                for file_name in sorted(files):
+                    if file_name.lower().endswith(RESUME_EXTENSIONS):
+                        file_path = os.path.join(root, file_name)
+                        yield file_path, file_path, file_name
+            return
+        
+        with zipfile.ZipFile(import_path) as archive:
+            for index, member in enumerate(sorted(archive.namelist())):
+                if not member.lower().endswith(RESUME_EXTENSIONS):
+                    continue
+                file_name = os.path.basename(member)
+                file_path = f"{import_path}!{member}"
+                staged_path = os.path.join(staging_dir, f"{index}_{file_name}")
+                try:
+                    with open(staged_path, 'wb') as f:
+                        f.write(archive.read(member))
+                except Exception as e:
+                    print(f"Error reading {file_path}: {e}")
+                    staged_path = ''
+                yield staged_path, file_path, file_name
+    
+    def bulk_import(self, import_path: str, workers: Optional[int] = None,
+                    batch_size: int = 500) -> Dict[str, Any]:
+        """Import every resume in a directory tree or zip archive.
+        
+        Files are hashed and their text extracted in a process pool, and rows are
+        inserted in batches, one transaction per batch. Files whose content hash was
+        already imported are skipped; files that cannot be read or have no text are
+        counted as failed (the latter are stored as Failed rows). Every file is counted once.
+        """
+        start_time = time.time()
+        existing_ids = self.fetch_resume_ids('import_')
+        workers = workers or os.cpu_count() or 1
+        counts = {'found': 0, 'imported': 0, 'skipped': 0, 'failed': 0}
+        batch: List[Dict[str, Any]] = []
+        
+        def flush() -> None:
+            inserted = set(self.add_resumes_to_database(batch))
+            for resume in batch:
+                if resume['id'] in inserted:
+                    # Files without extractable text are stored as Failed, so they are not retried
+                    counts['failed' if resume['status'] == 'Failed' else 'imported'] += 1
+                    inserted.discard(resume['id'])
+                else:
+                    # Rows ignored on insert were duplicates within this import
+                    counts['skipped'] += 1
+            batch.clear()
+            elapsed = time.time() - start_time
+            done = counts['imported'] + counts['skipped'] + counts['failed']
+            print(f"Processed {done}/{counts['found']} files, {counts['imported']} imported "
+                  f"({done / elapsed if elapsed > 0 else 0.0:.1f} files/s)")
+        
+        def collect(resume: Dict[str, Any], staged: bool, read_path: str) -> None:
+            if staged and read_path:
+                os.remove(read_path)
+            if resume['status'] == 'Skipped':
+                counts['skipped'] += 1
+                return
+            if resume['status'] == 'Error':
+                print(f"Error importing {resume['filePath']}: {resume['error']}")
+                counts['failed'] += 1
+                return
+            batch.append(resume)
+            if len(batch) >= batch_size:
+                flush()
+        
+        try:
+            with tempfile.TemporaryDirectory(prefix='resume_import_') as staging_dir, \
+                    ProcessPoolExecutor(max_workers=workers, initializer=_init_import_worker,
+                                        initargs=(existing_ids,)) as executor:
+                staged = zipfile.is_zipfile(import_path)
+                # Keep a bounded window of work in flight, so staged zip members are
+                # processed (and removed) while the archive is still being read
+                in_flight: Deque[Tuple[Any, str]] = deque()
+                for read_path, file_path, file_name in self.find_import_files(import_path, staging_dir):
+                    counts['found'] += 1
+                    if not read_path:
+                        counts['failed'] += 1
+                        continue
+                    in_flight.append((executor.submit(_extract_import_item, (read_path, file_path, file_name)),
+                                      read_path))
+                    while len(in_flight) > workers * 4:
+                        future, done_path = in_flight.popleft()
+                        collect(future.result(), staged, done_path)
+                while in_flight:
+                    future, done_path = in_flight.popleft()
+                    collect(future.result(), staged, done_path)
+        except Exception as e:
+            print(f"Error importing {import_path}: {e}")
+        
+        if batch:
+            flush()
+        
+        elapsed = time.time() - start_time
+        done = counts['imported'] + counts['skipped'] + counts['failed']
+        return {
+            'importPath': import_path,
+            **counts,
+            'seconds': round(elapsed, 2),
+            'filesPerSecond': round(done / elapsed, 2) if elapsed > 0 else 0.0
+        }
+    
+    def export_snapshot(self, snapshot_path: str) -> int:
+        """Export the processed resumes to a memory-mappable corpus snapshot (replaced atomically)"""
+        try:
+            return write_snapshot(snapshot_path, self.fetch_resumes_from_database('Processed'))
+        except Exception as e:
+            print(f"Error exporting corpus snapshot: {e}")
+            return 0
+
 if __name__ == "__main__":
-    # Example usage
+    import sys
+    
     db_source = DBSource()
-    resumes = db_source.fetch_resumes_from_database()
-    print(json.dumps(resumes, indent=2)) 
\ No newline at end of file
+    
+    if len(sys.argv) > 2 and sys.argv[1] == "bulk_import":
+        # Import a directory tree or zip archive of resumes
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        batch_size = int(sys.argv[4]) if len(sys.argv) > 4 else 500
+        summary = db_source.bulk_import(sys.argv[2], workers, batch_size)
+        print(json.dumps(summary, indent=2))
+    elif len(sys.argv) > 2 and sys.argv[1] == "export_snapshot":
+        # Export the corpus for shared, memory-mapped scoring
+        count = db_source.export_snapshot(sys.argv[2])
+        print(json.dumps({'snapshotPath': sys.argv[2], 'resumeCount': count}))
+    elif len(sys.argv) > 1 and sys.argv[1] == "processed":
+        # Only resumes already pre-processed by the ingestion daemon
+        resumes = db_source.fetch_resumes_from_database('Processed')
+        print(json.dumps(resumes, indent=2))
+    else:
+        # Example usage
+        resumes = db_source.fetch_resumes_from_database()
+        print(json.dumps(resumes, indent=2)) 
@@ -8,7 +8,8 @@ from datetime import datetime
 import base64
 import tempfile
 import shutil
-from typing import Optional, List, Dict, Any
+import hashlib
+from typing import Optional, List, Dict, Any, Tuple
 import sys
 
 class EmailSource:
@@ -121,13 +122,15 @@ class EmailSource:
                             # Check if attachment is a resume file
                             if any(filename.lower().endswith(ext) for ext in attachment_extensions):
                                 # Save attachment
-                                file_path = self.save_attachment(part, filename)
+                                saved = self.save_attachment(part, filename)
                                 
-                                if file_path:
+                                if saved:
+                                    file_path, content_hash = saved
                                     resume_data = {
                                         'id': str(len(resumes) + 1),
                                         'fileName': filename,
                                         'filePath': file_path,
+                                        'contentHash': content_hash,
                                         'emailSubject': subject,
                                         'emailSender': sender,
                                         'emailDate': date,
@@ -151,6 +154,23 @@ class EmailSource:
                 
         return resumes
     
+    def ingest_to_database(self, db_source: Any, subject_filter: str = "resume") -> List[Dict[str, Any]]:
+        """Fetch resumes from email and store new ones in the database.
+        
+        Ids are derived from the attachment content hashed when it was saved, so
+        re-polling the same mailbox does not create duplicates. Every stored resume
+        bumps the corpus version.
+        """
+        ingested = []
+        for resume in self.fetch_resumes_from_email(subject_filter):
+            resume['id'] = f"email_{resume['contentHash'][:16]}"
+            if db_source.resume_exists(resume['id']):
+                continue
+            if db_source.add_resume_to_database(resume):
+                ingested.append(resume)
+        
+        return ingested
+    
     def decode_email_header(self, header: Optional[str]) -> str:
         """Decode email header properly"""
         if header is None:
@@ -170,28 +190,31 @@ class EmailSource:
                 
         return decoded_string
     
-    def save_attachment(self, part: email.message.Message, filename: str) -> Optional[str]:
-        """Save email attachment to temp directory"""
+    def save_attachment(self, part: email.message.Message, filename: str) -> Optional[Tuple[str, str]]:
+        """Save email attachment to temp directory, returning (file path, content hash)"""
         try:
-            # Clean filename to avoid path issues
-            safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
-            file_path = os.path.join(self.temp_dir, safe_filename)
-            
             payload = part.get_payload(decode=True)
             if payload is None:
                 return None
-                
+            
             # Ensure payload is bytes
-            if isinstance(payload, bytes):
-                with open(file_path, 'wb') as f:
-                    f.write(payload)
-            else:
+            if not isinstance(payload, bytes):
                 # Handle other payload types
+                payload = str(payload).encode('utf-8')
+            content_hash = hashlib.sha256(payload).hexdigest()
+            
+            # Clean filename to avoid path issues, and prefix it with the content hash so
+            # attachments with the same name from different emails never overwrite each other
+            safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
+            safe_filename = f"{content_hash[:16]}_{safe_filename}"
+            file_path = os.path.join(self.temp_dir, safe_filename)
+            
+            # Same name means same content, so a re-polled attachment is not written again
+            if not os.path.exists(file_path):
                 with open(file_path, 'wb') as f:
-                    f.write(str(payload).encode('utf-8'))
-                
-            print(f"Saved attachment: {safe_filename}")
-            return file_path
+                    f.write(payload)
+                print(f"Saved attachment: {safe_filename}")
+            return file_path, content_hash
         except Exception as e:
             print(f"Error saving attachment {filename}: {e}")
             return None
@@ -237,6 +260,12 @@ def test_email_connection():
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         test_email_connection()
+    elif len(sys.argv) > 1 and sys.argv[1] == "ingest":
+        # Fetch resumes and store new ones in the database
+        from db_source import DBSource
+        email_source = EmailSource()
+        ingested = email_source.ingest_to_database(DBSource())
+        print(json.dumps(ingested, indent=2))
     elif len(sys.argv) > 1 and sys.argv[1] == "list":
         email_source = EmailSource()
         files = email_source.list_downloaded_files()
@@ -0,0 +1,273 @@
+import json
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from db_source import DBSource
+from email_source import EmailSource
+
+# Per-process parser for extraction workers, created on first use
+_worker_parser = None
+
+def _init_worker() -> None:
+    """Leave Ctrl+C to the daemon process, which shuts the pool down gracefully"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _extract_resume_text(file_path: str) -> str:
+    """Extract text from a resume file in a worker process"""
+    global _worker_parser
+    if _worker_parser is None:
+        from resume_parser import ResumeParser
+        _worker_parser = ResumeParser()
+    return _worker_parser.extract_text_from_file(file_path)
+
+class IngestionDaemon:
+    """Polls email for resumes and pre-processes pending database rows in the background.
+
+    New attachments are stored as Pending rows, then their text is extracted in a
+    bounded process pool and the rows are marked Processed (or Failed), so request-time
+    ranking only reads stored content. A health/metrics endpoint is served on localhost.
+    If a worker crashes the pool is replaced, and a file that keeps crashing it is marked Failed.
+    """
+
+    def __init__(self, db_source: DBSource, email_source: Optional[EmailSource] = None,
+                 poll_interval: float = 300.0, workers: int = 2, batch_size: int = 50,
+                 snapshot_path: Optional[str] = None, metrics_port: Optional[int] = 8765,
+                 max_attempts: int = 3, unhealthy_after: int = 3):
+        self.db_source = db_source
+        self.email_source = email_source
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.batch_size = batch_size
+        self.snapshot_path = snapshot_path
+        self.metrics_port = metrics_port
+        # Extraction attempts per resume that crashed a worker, and consecutive failed cycles
+        # before /health reports the daemon as unhealthy
+        self.max_attempts = max_attempts
+        self.unhealthy_after = unhealthy_after
+        self.crash_counts: Dict[str, int] = {}
+
+        self.stop_event = threading.Event()
+        self.started_at = time.time()
+        self.metrics_lock = threading.Lock()
+        self.metrics: Dict[str, Any] = {
+            'cycles': 0,
+            'emailsIngested': 0,
+            'resumesProcessed': 0,
+            'resumesFailed': 0,
+            'snapshotsExported': 0,
+            'poolRestarts': 0,
+            'failedCycles': 0,
+            'consecutiveFailedCycles': 0,
+            'lastCycleAt': None,
+            'lastCycleSeconds': None,
+            'lastError': None
+        }
+
+    def record(self, **updates: Any) -> None:
+        """Add to counters and set other metrics"""
+        with self.metrics_lock:
+            for name, value in updates.items():
+                if isinstance(self.metrics.get(name), int) and isinstance(value, int):
+                    self.metrics[name] += value
+                else:
+                    self.metrics[name] = value
+
+    def is_healthy(self) -> bool:
+        """False once the last unhealthy_after cycles have all failed"""
+        with self.metrics_lock:
+            return self.metrics['consecutiveFailedCycles'] < self.unhealthy_after
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of the daemon metrics and the current processing backlog"""
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['uptimeSeconds'] = round(time.time() - self.started_at, 1)
+        metrics['resumesByStatus'] = self.db_source.count_resumes_by_status()
+        metrics['corpusVersion'] = self.db_source.get_corpus_version()
+        return metrics
+
+    def poll_email(self) -> int:
+        """Store new email attachments as Pending resumes"""
+        if self.email_source is None:
+            return 0
+        ingested = self.email_source.ingest_to_database(self.db_source)
+        self.record(emailsIngested=len(ingested))
+        return len(ingested)
+
+    def process_pending(self, executor: ProcessPoolExecutor) -> int:
+        """Extract text for pending resumes batch by batch until none are left.
+
+        Raises BrokenProcessPool (after storing the results that did complete) when a
+        worker dies, so the caller can replace the pool.
+        """
+        processed = 0
+        while not self.stop_event.is_set():
+            pending = self.db_source.fetch_pending_resumes(self.batch_size)
+            if not pending:
+                break
+
+            # A resume that was in flight when the pool broke is retried on its own,
+            # so the file that crashes the worker is told apart from the rest of its batch
+            suspects = [resume for resume in pending if resume['id'] in self.crash_counts]
+            if suspects:
+                pending = suspects[:1]
+
+            # Rows that already carry content only need their status updated
+            futures = {resume['id']: executor.submit(_extract_resume_text, resume['filePath'])
+                       for resume in pending if not resume.get('content') and resume.get('filePath')}
+
+            broken: Optional[BrokenProcessPool] = None
+            updated = 0
+            for resume in pending:
+                content = resume.get('content') or ''
+                if resume['id'] in futures:
+                    try:
+                        content = futures[resume['id']].result()
+                    except BrokenProcessPool as e:
+                        broken = e
+                        attempts = self.crash_counts.get(resume['id'], 0) + 1
+                        if attempts < self.max_attempts:
+                            self.crash_counts[resume['id']] = attempts
+                            continue
+                        print(f"Giving up on {resume['id']}: extraction crashed {attempts} times")
+                self.crash_counts.pop(resume['id'], None)
+
+                status = 'Processed' if content else 'Failed'
+                if self.db_source.update_resume_status(resume['id'], status, content or None):
+                    updated += 1
+                    self.record(**{'resumesProcessed' if content else 'resumesFailed': 1})
+            processed += updated
+
+            if broken is not None:
+                raise broken
+            if updated == 0:
+                # Nothing could be written, fetching the same batch again would never end
+                raise RuntimeError(f"Could not update any of {len(pending)} pending resumes")
+
+        return processed
+
+    def run_cycle(self, executor: ProcessPoolExecutor) -> Optional[Exception]:
+        """One poll: ingest email, process pending rows, refresh the snapshot if anything changed.
+
+        Returns the error that ended the cycle, or None if it succeeded.
+        """
+        start_time = time.time()
+        error: Optional[Exception] = None
+        try:
+            self.poll_email()
+            processed = self.process_pending(executor)
+            if processed and self.snapshot_path:
+                self.db_source.export_snapshot(self.snapshot_path)
+                self.record(snapshotsExported=1)
+        except Exception as e:
+            error = e
+            print(f"Error in ingestion cycle: {e!r}")
+            self.record(failedCycles=1, lastError=f"{datetime.now().isoformat()}: {e!r}")
+
+        with self.metrics_lock:
+            self.metrics['consecutiveFailedCycles'] = self.metrics['consecutiveFailedCycles'] + 1 if error else 0
+        self.record(cycles=1, lastCycleAt=datetime.now().isoformat(),
+                    lastCycleSeconds=round(time.time() - start_time, 2))
+        return error
+
+    def start_metrics_server(self) -> ThreadingHTTPServer:
+        """Serve /health and /metrics as JSON on localhost"""
+        daemon = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                code = 200
+                if self.path == '/health':
+                    if daemon.stop_event.is_set():
+                        body = {'status': 'stopping'}
+                    elif daemon.is_healthy():
+                        body = {'status': 'ok'}
+                    else:
+                        code = 503
+                        body = {'status': 'unhealthy', 'lastError': daemon.get_metrics()['lastError']}
+                elif self.path == '/metrics':
+                    body = daemon.get_metrics()
+                else:
+                    self.send_error(404)
+                    return
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', self.metrics_port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Metrics available at http://127.0.0.1:{server.server_address[1]}/metrics")
+        return server
+
+    def stop(self, *_: Any) -> None:
+        """Request a graceful shutdown; the current batch is finished first"""
+        print("Stopping ingestion daemon...")
+        self.stop_event.set()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        """Start a pool of extraction worker processes"""
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def run(self, once: bool = False) -> None:
+        """Run polling cycles until stopped (or a single cycle if once is set)"""
+        server = self.start_metrics_server() if self.metrics_port is not None else None
+        executor = self.create_executor()
+        try:
+            while not self.stop_event.is_set():
+                error = self.run_cycle(executor)
+                if isinstance(error, BrokenProcessPool):
+                    # A broken pool rejects every later task, so replace it and retry straight away
+                    print("Extraction worker died, restarting the worker pool")
+                    executor.shutdown(wait=False)
+                    executor = self.create_executor()
+                    self.record(poolRestarts=1)
+                    if not once:
+                        continue
+                if once:
+                    break
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            executor.shutdown()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        print("Ingestion daemon stopped")
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Poll email and pre-process resumes continuously")
+    arg_parser.add_argument('--db', default='resumes.db', help="SQLite database path")
+    arg_parser.add_argument('--interval', type=float, default=300.0, help="Seconds between polls")
+    arg_parser.add_argument('--workers', type=int, default=2, help="Text extraction worker processes")
+    arg_parser.add_argument('--batch-size', type=int, default=50, help="Pending resumes per batch")
+    arg_parser.add_argument('--snapshot', help="Corpus snapshot to refresh after each change")
+    arg_parser.add_argument('--port', type=int, default=8765, help="Health/metrics port on 127.0.0.1")
+    arg_parser.add_argument('--no-email', action='store_true', help="Only process pending database rows")
+    arg_parser.add_argument('--once', action='store_true', help="Run a single cycle and exit")
+    args = arg_parser.parse_args()
+
+    daemon = IngestionDaemon(
+        DBSource(args.db),
+        None if args.no_email else EmailSource(),
+        poll_interval=args.interval,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        snapshot_path=args.snapshot,
+        metrics_port=args.port
+    )
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run(once=args.once)
+    print(json.dumps(daemon.get_metrics(), indent=2))
@@ -0,0 +1,283 @@
+import sqlite3
+import json
+import hashlib
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+def make_job_key(job_description: str, required_skills: Optional[List[str]], *extra: Any) -> str:
+    """Hash a job; case and whitespace in the job description do not affect scoring"""
+    normalized_description = " ".join(job_description.lower().split())
+    normalized_skills = sorted(skill.strip().lower() for skill in (required_skills or []))
+    payload = json.dumps([normalized_description, normalized_skills, *extra])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def compact_rankings(rankings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reduce rankings to what is not stored in the resumes table (resume id, score, matches)"""
+    entries = []
+    for ranking in rankings:
+        entry = {
+            'id': ranking['resume'].get('id'),
+            'score': ranking['score'],
+            'keywordMatches': ranking['keywordMatches']
+        }
+        if 'resumeSource' in ranking:
+            entry['resumeSource'] = ranking['resumeSource']
+        entries.append(entry)
+    return entries
+
+def expand_rankings(entries: List[Dict[str, Any]], resumes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rejoin compact entries with their resume rows (by id) and renumber the ranks.
+
+    Entries whose resume is no longer in resumes are dropped.
+    """
+    rankings = []
+    for entry in entries:
+        resume = resumes.get(entry['id'])
+        if resume is None:
+            continue
+        ranking = {
+            'resume': resume,
+            'score': entry['score'],
+            'rank': len(rankings) + 1,
+            'keywordMatches': entry['keywordMatches']
+        }
+        if 'resumeSource' in entry:
+            ranking['resumeSource'] = entry['resumeSource']
+        rankings.append(ranking)
+    return rankings
+
+class RankingCache:
+    """Size-bounded LRU cache of ranking results, stored next to the resumes.
+
+    Entries are keyed by the normalized job description, the required skills and
+    the corpus version, so any change to the resumes makes older entries unreachable.
+    The cache lives in SQLite because every API call runs in a fresh Python process.
+    Only compact entries (see compact_rankings) are stored, never the resume content.
+    """
+
+    def __init__(self, db_path: str = "resumes.db", max_entries: int = 100, scoring_version: str = ''):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        # Identifies the scoring configuration (e.g. the skill taxonomy) the rankings were made with
+        self.scoring_version = scoring_version
+        self.init_cache()
+
+    def init_cache(self) -> None:
+        """Initialize the cache tables"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ranking_cache (
+                    cacheKey TEXT PRIMARY KEY,
+                    corpusVersion INTEGER NOT NULL,
+                    rankings TEXT NOT NULL,
+                    lastAccessed REAL NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ranking_cache_stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            cursor.executemany("INSERT OR IGNORE INTO ranking_cache_stats (name, value) VALUES (?, 0)",
+                               [('hits',), ('misses',), ('evictions',)])
+
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Error initializing ranking cache: {e}")
+
+    def make_key(self, job_description: str, required_skills: Optional[List[str]], corpus_version: int) -> str:
+        """Build the cache key for a job at a corpus version"""
+        return make_job_key(job_description, required_skills, self.scoring_version, corpus_version)
+
+    def get(self, job_description: str, required_skills: Optional[List[str]],
+            corpus_version: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached compact rankings or None, recording a hit or a miss"""
+        if corpus_version < 0:
+            return None
+
+        cache_key = self.make_key(job_description, required_skills, corpus_version)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT rankings FROM ranking_cache WHERE cacheKey = ?", (cache_key,))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("UPDATE ranking_cache SET lastAccessed = ? WHERE cacheKey = ?",
+                               (time.time(), cache_key))
+            self._increment(cursor, 'hits' if row else 'misses')
+
+            conn.commit()
+            conn.close()
+            return json.loads(row[0]) if row else None
+
+        except Exception as e:
+            print(f"Error reading ranking cache: {e}")
+            return None
+
+    def put(self, job_description: str, required_skills: Optional[List[str]],
+            corpus_version: int, rankings: List[Dict[str, Any]]) -> None:
+        """Store rankings, dropping stale versions and least recently used entries"""
+        if corpus_version < 0:
+            return
+
+        cache_key = self.make_key(job_description, required_skills, corpus_version)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            # Entries for older corpus versions can never be hit again
+            cursor.execute("DELETE FROM ranking_cache WHERE corpusVersion < ?", (corpus_version,))
+            evicted = cursor.rowcount
+
+            cursor.execute('''
+                INSERT OR REPLACE INTO ranking_cache (cacheKey, corpusVersion, rankings, lastAccessed)
+                VALUES (?, ?, ?, ?)
+            ''', (cache_key, corpus_version, json.dumps(compact_rankings(rankings)), time.time()))
+
+            cursor.execute('''
+                DELETE FROM ranking_cache WHERE cacheKey IN (
+                    SELECT cacheKey FROM ranking_cache
+                    ORDER BY lastAccessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+            evicted += cursor.rowcount
+            if evicted > 0:
+                self._increment(cursor, 'evictions', evicted)
+
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Error writing ranking cache: {e}")
+
+    def _increment(self, cursor: sqlite3.Cursor, name: str, amount: int = 1) -> None:
+        cursor.execute("UPDATE ranking_cache_stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current number of entries"""
+        stats: Dict[str, Any] = {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT name, value FROM ranking_cache_stats")
+            for name, value in cursor.fetchall():
+                stats[name] = value
+            cursor.execute("SELECT COUNT(*) FROM ranking_cache")
+            stats['entries'] = cursor.fetchone()[0]
+
+            conn.close()
+
+        except Exception as e:
+            print(f"Error reading ranking cache stats: {e}")
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hitRate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Remove all cached rankings (counters are kept)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("DELETE FROM ranking_cache")
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Error clearing ranking cache: {e}")
+
+class RankingStore:
+    """Persisted, fully ordered ranking per job, used for incremental re-ranking.
+
+    Each entry records the corpus version it reflects, so a refresh only has to
+    score the resumes changed since then. Entries are compact (see compact_rankings)
+    and only the max_entries most recently used jobs are kept.
+    """
+
+    def __init__(self, db_path: str = "resumes.db", max_entries: int = 100, scoring_version: str = ''):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        # Identifies the scoring configuration (e.g. the skill taxonomy) the rankings were made with
+        self.scoring_version = scoring_version
+        self.init_store()
+
+    def init_store(self) -> None:
+        """Initialize the job rankings table"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_rankings (
+                    jobKey TEXT PRIMARY KEY,
+                    corpusVersion INTEGER NOT NULL,
+                    rankings TEXT NOT NULL,
+                    updatedAt REAL NOT NULL
+                )
+            ''')
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Error initializing ranking store: {e}")
+
+    def load(self, job_description: str,
+             required_skills: Optional[List[str]]) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """Return (corpus version, compact rankings) stored for a job, or None"""
+        job_key = make_job_key(job_description, required_skills, self.scoring_version)
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT corpusVersion, rankings FROM job_rankings WHERE jobKey = ?", (job_key,))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("UPDATE job_rankings SET updatedAt = ? WHERE jobKey = ?", (time.time(), job_key))
+                conn.commit()
+            conn.close()
+            return (row[0], json.loads(row[1])) if row else None
+
+        except Exception as e:
+            print(f"Error loading stored rankings: {e}")
+            return None
+
+    def save(self, job_description: str, required_skills: Optional[List[str]],
+             corpus_version: int, rankings: List[Dict[str, Any]]) -> None:
+        """Store the rankings of a job as of a corpus version, dropping least recently used jobs"""
+        if corpus_version < 0:
+            return
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                INSERT OR REPLACE INTO job_rankings (jobKey, corpusVersion, rankings, updatedAt)
+                VALUES (?, ?, ?, ?)
+            ''', (make_job_key(job_description, required_skills, self.scoring_version), corpus_version,
+                  json.dumps(compact_rankings(rankings)), time.time()))
+            conn.execute('''
+                DELETE FROM job_rankings WHERE jobKey IN (
+                    SELECT jobKey FROM job_rankings
+                    ORDER BY updatedAt DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            print(f"Error saving rankings: {e}")
+
+if __name__ == "__main__":
+    import sys
+
+    cache = RankingCache()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "clear":
+        cache.clear()
+
+    print(json.dumps(cache.get_stats(), indent=2))
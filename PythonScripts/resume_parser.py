@@ -1,13 +1,19 @@
 import re
 import json
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import heapq
+import multiprocessing
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Set
 from collections import Counter
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 import PyPDF2
 from docx import Document
+from corpus_snapshot import CorpusSnapshot
+from ranking_cache import RankingCache, RankingStore, expand_rankings
+from skill_taxonomy import load_taxonomy, DEFAULT_TAXONOMY_PATH
 
 # Download required NLTK data
 try:
@@ -20,11 +26,38 @@ try:
 except LookupError:
     nltk.download('stopwords')
 
+class _WorstFirst:
+    """Heap entry ordered by descending sort key, so a heap keeps its worst ranking on top"""
+    __slots__ = ('key', 'ranking')
+
+    def __init__(self, key: Tuple[Any, ...], ranking: Dict[str, Any]):
+        self.key = key
+        self.ranking = ranking
+
+    def __lt__(self, other: '_WorstFirst') -> bool:
+        return self.key > other.key
+
+# Per-process state for snapshot scoring workers, set by _init_snapshot_worker
+_worker_state: Dict[str, Any] = {}
+
+def _init_snapshot_worker(snapshot_path: str, job_profile: Dict[str, Any]) -> None:
+    """Open the shared corpus snapshot once per worker process"""
+    _worker_state['parser'] = ResumeParser()
+    _worker_state['snapshot'] = CorpusSnapshot(snapshot_path)
+    _worker_state['jobProfile'] = job_profile
+
+def _score_snapshot_range(doc_range: Tuple[int, int]) -> List[Dict[str, Any]]:
+    """Score a range of snapshot documents in a worker process"""
+    return _worker_state['parser'].score_snapshot_range(
+        _worker_state['snapshot'], _worker_state['jobProfile'], *doc_range)
+
 class ResumeParser:
-    def __init__(self):
+    def __init__(self, taxonomy_path: Optional[str] = None):
         self.stop_words = set(stopwords.words('english'))
         # Add common resume stop words
         self.stop_words.update(['experience', 'years', 'skills', 'education', 'work', 'job', 'position'])
+        # Compiled skill taxonomy, shared by keyword and skills scoring
+        self.taxonomy = load_taxonomy(taxonomy_path or DEFAULT_TAXONOMY_PATH)
     
     def extract_text_from_file(self, file_path: str) -> str:
         """Extract text from PDF or DOCX file"""
@@ -81,14 +114,26 @@ class ResumeParser:
     
     def calculate_keyword_matches(self, resume_text: str, keywords: List[str]) -> List[Dict[str, Any]]:
         """Calculate keyword matches in resume text"""
-        resume_lower = resume_text.lower()
+        resume_profile = self.prepare_resume_profile(resume_text)
+        return self.match_keywords(resume_profile, self.resolve_terms(keywords))
+    
+    def resolve_terms(self, terms: List[str]) -> List[Tuple[str, Optional[str]]]:
+        """Pair each lowercased term with its canonical taxonomy skill (None if unknown)"""
+        return [(term.lower(), self.taxonomy.canonical(term)) for term in terms]
+    
+    def term_in_resume(self, term: str, skill: Optional[str], resume_profile: Dict[str, Any]) -> bool:
+        """Taxonomy skills match on token boundaries and aliases, other terms as substrings"""
+        if skill:
+            return skill in resume_profile['skills']
+        return term in resume_profile['text']
+    
+    def match_keywords(self, resume_profile: Dict[str, Any],
+                       keywords: List[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """Match resolved keywords against a prepared resume"""
         matches = []
         
-        for keyword in keywords:
-            # Count occurrences
-            count = resume_lower.count(keyword.lower())
-            
-            if count > 0:
+        for keyword, skill in keywords:
+            if self.term_in_resume(keyword, skill, resume_profile):
                 # Find context around keyword
                 # context = self.find_keyword_context(resume_text, keyword)
                 
@@ -134,29 +179,24 @@ class ResumeParser:
         # Base weight from frequency
         base_weight = min(count * 0.1, 1.0)
         
-        # Boost for important technical keywords
-        technical_keywords = [
-            'python', 'java', 'c#', 'javascript', 'react', 'angular', 'vue',
-            'sql', 'mysql', 'postgresql', 'mongodb', 'docker', 'kubernetes',
-            'aws', 'azure', 'gcp', 'git', 'jenkins', 'agile', 'scrum'
-        ]
-        
-        if keyword.lower() in technical_keywords:
-            base_weight *= 1.5
+        # Boost for important technical keywords, as weighted in the skill taxonomy
+        base_weight *= self.taxonomy.weight(keyword)
         
         return min(base_weight, 1.0)
     
     def calculate_skills_match_percentage(self, resume_text: str, required_skills: List[str]) -> float:
         """Calculate percentage of required skills found in resume"""
+        resume_profile = self.prepare_resume_profile(resume_text)
+        return self.match_skills_percentage(resume_profile, self.resolve_terms(required_skills))
+    
+    def match_skills_percentage(self, resume_profile: Dict[str, Any],
+                                required_skills: List[Tuple[str, Optional[str]]]) -> float:
+        """Percentage of resolved required skills found in a prepared resume"""
         if not required_skills:
             return 0.0
         
-        resume_lower = resume_text.lower()
-        found_skills = 0
-        
-        for skill in required_skills:
-            if skill.lower() in resume_lower:
-                found_skills += 1
+        found_skills = sum(1 for skill, canonical in required_skills
+                           if self.term_in_resume(skill, canonical, resume_profile))
         
         return (found_skills / len(required_skills)) * 100
     
@@ -165,7 +205,10 @@ class ResumeParser:
         # Extract years of experience from resume
         resume_years = self.extract_years_of_experience(resume_text)
         job_years = self.extract_years_of_experience(job_description)
-        
+        return self.calculate_experience_match_from_years(resume_years, job_years)
+    
+    def calculate_experience_match_from_years(self, resume_years: List[int], job_years: List[int]) -> float:
+        """Calculate experience match percentage from already extracted years"""
         if not resume_years or not job_years:
             return 50.0  # Default score if can't determine
         
@@ -200,42 +243,61 @@ class ResumeParser:
         
         return years
     
-    def rank_resume(self, resume_data: Dict[str, Any], job_description: str, 
-                   required_skills: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Rank a resume against job description"""
-        # Extract text from resume
+    def prepare_job_profile(self, job_description: str,
+                            required_skills: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Precompute the job-side inputs used to score resumes against a job"""
+        return {
+            'jobDescription': job_description,
+            'keywords': self.resolve_terms(self.extract_keywords_from_job_description(job_description)),
+            'requiredSkills': self.resolve_terms(required_skills or []),
+            'jobYears': self.extract_years_of_experience(job_description)
+        }
+    
+    def prepare_resume_profile(self, resume_text: str, skills: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Lowercase resume text once and extract everything scoring needs from it.
+        
+        skills can be passed when the taxonomy matches are already known (e.g. from a snapshot).
+        """
+        resume_lower = resume_text.lower()
+        return {
+            'text': resume_lower,
+            'years': self.extract_years_of_experience(resume_lower),
+            'skills': self.taxonomy.find_skills(resume_lower) if skills is None else skills
+        }
+    
+    def get_resume_text(self, resume_data: Dict[str, Any], extract_missing: bool = True) -> str:
+        """Return resume content, extracting it from the file if missing (and extract_missing is set)"""
         resume_text = resume_data.get('content', '')
-        if not resume_text and resume_data.get('filePath'):
+        if not resume_text and extract_missing and resume_data.get('filePath'):
             resume_text = self.extract_text_from_file(resume_data['filePath'])
-        
-        if not resume_text:
-            return {
-                'resume': resume_data,
-                'score': 0.0,
-                'rank': 999,
-                'keywordMatches': [],
-                # 'skillsMatchPercentage': 0.0,
-                # 'experienceMatchPercentage': 0.0,
-                # 'summary': 'No text content found'
-            }
-        
-        # Extract keywords from job description
-        keywords = self.extract_keywords_from_job_description(job_description)
-        
+        return resume_text or ''
+    
+    def empty_ranking(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ranking returned for a resume without any text content"""
+        return {
+            'resume': resume_data,
+            'score': 0.0,
+            'rank': 999,
+            'keywordMatches': [],
+            # 'skillsMatchPercentage': 0.0,
+            # 'experienceMatchPercentage': 0.0,
+            # 'summary': 'No text content found'
+        }
+    
+    def score_resume(self, resume_data: Dict[str, Any], resume_profile: Dict[str, Any],
+                     job_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Score a prepared resume against a prepared job profile"""
         # Calculate keyword matches
-        keyword_matches = self.calculate_keyword_matches(resume_text, keywords)
+        keyword_matches = self.match_keywords(resume_profile, job_profile['keywords'])
         
         # Calculate scores
         keyword_score = sum(match['weight'] for match in keyword_matches)
-        skills_score = self.calculate_skills_match_percentage(resume_text, required_skills or [])
-        experience_score = self.calculate_experience_match_percentage(resume_text, job_description)
+        skills_score = self.match_skills_percentage(resume_profile, job_profile['requiredSkills'])
+        experience_score = self.calculate_experience_match_from_years(resume_profile['years'], job_profile['jobYears'])
         
         # Calculate overall score (weighted average)
         overall_score = (keyword_score * 0.5 + skills_score * 0.3 + experience_score * 0.2)
         
-        # Generate summary
-        summary = self.generate_ranking_summary(keyword_matches, skills_score, experience_score)
-        
         return {
             'resume': resume_data,
             'score': round(overall_score, 2),
@@ -243,10 +305,25 @@ class ResumeParser:
             'keywordMatches': keyword_matches,
             # 'skillsMatchPercentage': round(skills_score, 2),
             # 'experienceMatchPercentage': round(experience_score, 2),
-            # 'summary': summary,
+            # 'summary': self.generate_ranking_summary(keyword_matches, skills_score, experience_score),
             'resumeSource': resume_data.get('source', 'Unknown')
         }
     
+    def rank_resume(self, resume_data: Dict[str, Any], job_description: str, 
+                   required_skills: Optional[List[str]] = None,
+                   job_profile: Optional[Dict[str, Any]] = None,
+                   extract_missing: bool = True) -> Dict[str, Any]:
+        """Rank a resume against job description"""
+        # Extract text from resume
+        resume_text = self.get_resume_text(resume_data, extract_missing)
+        if not resume_text:
+            return self.empty_ranking(resume_data)
+        
+        if job_profile is None:
+            job_profile = self.prepare_job_profile(job_description, required_skills)
+        
+        return self.score_resume(resume_data, self.prepare_resume_profile(resume_text), job_profile)
+    
     def generate_ranking_summary(self, keyword_matches: List[Dict[str, Any]], 
                                skills_score: float, experience_score: float) -> str:
         """Generate a summary of the ranking"""
@@ -269,17 +346,202 @@ class ResumeParser:
         
         return ". ".join(summary_parts) + "."
     
+    @staticmethod
+    def ranking_sort_key(ranking: Dict[str, Any]) -> Tuple[float, str, float, str]:
+        """Sort by score descending, then by candidate name (emailSender) ascending for ties.
+        
+        Remaining ties go newest first (createdAt descending), then by id, so every ranking
+        path (full, incremental, snapshot, multi-job) produces the same order.
+        """
+        resume = ranking['resume']
+        try:
+            created = datetime.fromisoformat(resume.get('createdAt') or '').timestamp()
+        except ValueError:
+            created = 0.0
+        return (-ranking['score'], resume.get('emailSender', ''), -created, str(resume.get('id', '')))
+    
     def rank_resumes(self, resumes: List[Dict[str, Any]], job_description: str,
-                    required_skills: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+                    required_skills: Optional[List[str]] = None,
+                    extract_missing: bool = True) -> List[Dict[str, Any]]:
         """Rank multiple resumes against job description"""
         rankings = []
+        job_profile = self.prepare_job_profile(job_description, required_skills)
         
         for resume in resumes:
-            ranking = self.rank_resume(resume, job_description, required_skills)
+            ranking = self.rank_resume(resume, job_description, required_skills, job_profile, extract_missing)
             rankings.append(ranking)
         
         # Sort by score descending, then by candidate name (emailSender) ascending for ties
-        rankings.sort(key=lambda x: (-x['score'], x['resume'].get('emailSender', '')))
+        rankings.sort(key=self.ranking_sort_key)
+        
+        for i, ranking in enumerate(rankings):
+            ranking['rank'] = i + 1
+        
+        return rankings
+    
+    def rank_cached(self, db_source: Any, job_description: str,
+                    required_skills: Optional[List[str]] = None,
+                    cache: Optional[RankingCache] = None) -> List[Dict[str, Any]]:
+        """Rank the processed database resumes, reusing the cached result while the corpus is unchanged.
+        
+        Only stored content is read; text extraction is left to the ingestion daemon.
+        """
+        if cache is None:
+            cache = RankingCache(db_source.db_path, scoring_version=self.taxonomy.fingerprint)
+        
+        corpus_version = db_source.get_corpus_version()
+        resumes = db_source.fetch_resumes_from_database('Processed')
+        entries = cache.get(job_description, required_skills, corpus_version)
+        if entries is not None:
+            # The cache holds ids and scores only, the resumes are unchanged at this corpus version
+            return expand_rankings(entries, {resume['id']: resume for resume in resumes})
+        
+        rankings = self.rank_resumes(resumes, job_description, required_skills, extract_missing=False)
+        # Only cache if nothing changed while ranking
+        if db_source.get_corpus_version() == corpus_version:
+            cache.put(job_description, required_skills, corpus_version, rankings)
+        return rankings
+    
+    def rank_incremental(self, db_source: Any, job_description: str,
+                         required_skills: Optional[List[str]] = None,
+                         store: Optional[RankingStore] = None) -> List[Dict[str, Any]]:
+        """Rank the processed database resumes, re-scoring only those changed since the stored ranking.
+        
+        The first call scores the whole corpus and stores the ordered result. Later calls
+        score the resumes added or updated since then and merge them into the stored order;
+        resumes that are no longer Processed drop out. Text is never extracted here.
+        """
+        if store is None:
+            store = RankingStore(db_source.db_path, scoring_version=self.taxonomy.fingerprint)
+        
+        stored = store.load(job_description, required_skills)
+        stored_version = stored[0] if stored else -1
+        changed, corpus_version = db_source.fetch_resumes_changed_since(stored_version)
+        if corpus_version < 0:
+            return self.rank_resumes(db_source.fetch_resumes_from_database('Processed'), job_description,
+                                     required_skills, extract_missing=False)
+        processed = [resume for resume in changed if resume.get('status') == 'Processed']
+        
+        if stored is None:
+            rankings = self.rank_resumes(processed, job_description, required_skills, extract_missing=False)
+        elif not changed:
+            rankings = expand_rankings(stored[1], self._processed_by_id(db_source))
+        else:
+            job_profile = self.prepare_job_profile(job_description, required_skills)
+            new_rankings = [self.rank_resume(resume, job_description, required_skills, job_profile, False)
+                            for resume in processed]
+            new_rankings.sort(key=self.ranking_sort_key)
+            
+            # Drop the previous entries of every changed resume, then merge the two ordered lists
+            changed_ids = {resume['id'] for resume in changed}
+            kept = expand_rankings([entry for entry in stored[1] if entry['id'] not in changed_ids],
+                                   self._processed_by_id(db_source))
+            rankings = list(heapq.merge(kept, new_rankings, key=self.ranking_sort_key))
+            
+            for i, ranking in enumerate(rankings):
+                ranking['rank'] = i + 1
+        
+        if corpus_version != stored_version:
+            store.save(job_description, required_skills, corpus_version, rankings)
+        return rankings
+    
+    def _processed_by_id(self, db_source: Any) -> Dict[str, Dict[str, Any]]:
+        """Processed database resumes by id, for rejoining stored rankings"""
+        return {resume['id']: resume for resume in db_source.fetch_resumes_from_database('Processed')}
+    
+    def rank_many(self, resumes: Iterable[Dict[str, Any]], jobs: List[Dict[str, Any]],
+                  top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank one resume stream against several jobs in a single pass.
+        
+        Each job is a dict with 'jobDescription' and optional 'requiredSkills' and 'id'.
+        Every resume is read, lowercased, matched against the skill taxonomy and (if needed)
+        extracted once, then scored against all jobs. A separate top-K list is kept per job
+        (all resumes if top_k is None).
+        """
+        job_profiles = [self.prepare_job_profile(job.get('jobDescription', ''), job.get('requiredSkills'))
+                        for job in jobs]
+        # Per job: (sort_key, ranking) pairs; arrival order makes keys unique so rankings never compare.
+        # With top_k this is a heap whose first entry is the worst ranking kept so far.
+        job_rankings: List[List[Any]] = [[] for _ in jobs]
+        
+        for seq, resume in enumerate(resumes):
+            resume_text = self.get_resume_text(resume)
+            if resume_text:
+                resume_profile = self.prepare_resume_profile(resume_text)
+            
+            for job_profile, rankings in zip(job_profiles, job_rankings):
+                if resume_text:
+                    ranking = self.score_resume(resume, resume_profile, job_profile)
+                else:
+                    ranking = self.empty_ranking(resume)
+                
+                sort_key = self.ranking_sort_key(ranking) + (seq,)
+                if top_k is None:
+                    rankings.append((sort_key, ranking))
+                elif len(rankings) < top_k:
+                    heapq.heappush(rankings, _WorstFirst(sort_key, ranking))
+                elif top_k > 0 and sort_key < rankings[0].key:
+                    heapq.heapreplace(rankings, _WorstFirst(sort_key, ranking))
+        
+        results = []
+        for index, (job, rankings) in enumerate(zip(jobs, job_rankings)):
+            if top_k is not None:
+                rankings = [(entry.key, entry.ranking) for entry in rankings]
+            rankings.sort(key=lambda entry: entry[0])
+            ordered = [ranking for _, ranking in rankings]
+            for i, ranking in enumerate(ordered):
+                ranking['rank'] = i + 1
+            results.append({
+                'jobId': job.get('id', str(index + 1)),
+                'rankings': ordered
+            })
+        
+        return results
+
+    def score_snapshot_range(self, snapshot: CorpusSnapshot, job_profile: Dict[str, Any],
+                             start: int, end: int) -> List[Dict[str, Any]]:
+        """Score snapshot documents [start, end) against a prepared job profile"""
+        # Stored term IDs are the taxonomy skills of each document, valid for the same taxonomy only
+        use_terms = snapshot.taxonomy_fingerprint == self.taxonomy.fingerprint
+        rankings = []
+        for doc in range(start, end):
+            resume_data = snapshot.resume(doc)
+            resume_lower = snapshot.text(doc)
+            if not resume_lower:
+                # Snapshots only hold stored content, files are never extracted at request time
+                rankings.append(self.empty_ranking(resume_data))
+                continue
+            resume_profile = self.prepare_resume_profile(
+                resume_lower, snapshot.skills(doc) if use_terms else None)
+            rankings.append(self.score_resume(resume_data, resume_profile, job_profile))
+        return rankings
+    
+    def rank_snapshot(self, snapshot_path: str, job_description: str,
+                      required_skills: Optional[List[str]] = None,
+                      workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank every resume in a corpus snapshot, optionally across worker processes.
+        
+        Workers map the snapshot read-only instead of receiving pickled resume text;
+        only document ranges go in and rankings come back. Returned 'resume' entries
+        hold the snapshot metadata, without content.
+        """
+        job_profile = self.prepare_job_profile(job_description, required_skills)
+        workers = workers or os.cpu_count() or 1
+        
+        with CorpusSnapshot(snapshot_path) as snapshot:
+            doc_count = len(snapshot)
+            if workers <= 1 or doc_count < 2:
+                rankings = self.score_snapshot_range(snapshot, job_profile, 0, doc_count)
+            else:
+                chunk_size = -(-doc_count // (workers * 4))
+                doc_ranges = [(start, min(start + chunk_size, doc_count))
+                              for start in range(0, doc_count, chunk_size)]
+                with multiprocessing.Pool(workers, _init_snapshot_worker, (snapshot_path, job_profile)) as pool:
+                    rankings = [ranking for chunk in pool.map(_score_snapshot_range, doc_ranges)
+                                for ranking in chunk]
+        
+        # Same ordering as rank_resumes
+        rankings.sort(key=self.ranking_sort_key)
         
         for i, ranking in enumerate(rankings):
             ranking['rank'] = i + 1
@@ -348,10 +610,47 @@ if __name__ == "__main__":
         rankings = parser.rank_resumes(resumes, job_description)
         print(json.dumps(rankings))
     
+    elif sys.argv[1] == "rank_many" and len(sys.argv) > 3:
+        # Rank one set of resumes against multiple jobs in a single pass
+        resumes = json.loads(sys.argv[2])
+        jobs = json.loads(sys.argv[3])
+        top_k = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        results = parser.rank_many(resumes, jobs, top_k)
+        print(json.dumps(results))
+    
+    elif sys.argv[1] == "rank_cached" and len(sys.argv) > 2:
+        # Rank database resumes, served from the ranking cache when the corpus is unchanged
+        from db_source import DBSource
+        job_description = sys.argv[2]
+        required_skills = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+        rankings = parser.rank_cached(DBSource(), job_description, required_skills)
+        print(json.dumps(rankings))
+    
+    elif sys.argv[1] == "rank_incremental" and len(sys.argv) > 2:
+        # Rank database resumes, re-scoring only resumes changed since the last call
+        from db_source import DBSource
+        job_description = sys.argv[2]
+        required_skills = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+        rankings = parser.rank_incremental(DBSource(), job_description, required_skills)
+        print(json.dumps(rankings))
+    
+    elif sys.argv[1] == "rank_snapshot" and len(sys.argv) > 3:
+        # Rank all resumes in a memory-mapped corpus snapshot
+        snapshot_path = sys.argv[2]
+        job_description = sys.argv[3]
+        required_skills = json.loads(sys.argv[4]) if len(sys.argv) > 4 else None
+        workers = int(sys.argv[5]) if len(sys.argv) > 5 else None
+        rankings = parser.rank_snapshot(snapshot_path, job_description, required_skills, workers)
+        print(json.dumps(rankings))
+    
     else:
         print("Usage:")
         print("  python resume_parser.py                                    # Process all resumes in temp_resumes")
         print("  python resume_parser.py extract_text <file_path>          # Extract text from file")
         print("  python resume_parser.py extract_keywords <job_description> # Extract keywords")
         print("  python resume_parser.py rank_resume <resume_json> <job_description> # Rank single resume")
-        print("  python resume_parser.py rank_resumes <resumes_json> <job_description> # Rank multiple resumes") 
\ No newline at end of file
+        print("  python resume_parser.py rank_resumes <resumes_json> <job_description> # Rank multiple resumes")
+        print("  python resume_parser.py rank_many <resumes_json> <jobs_json> [top_k] # Rank resumes against multiple jobs")
+        print("  python resume_parser.py rank_cached <job_description> [skills_json] # Rank database resumes with caching")
+        print("  python resume_parser.py rank_incremental <job_description> [skills_json] # Rank database resumes incrementally")
+        print("  python resume_parser.py rank_snapshot <snapshot_path> <job_description> [skills_json] [workers] # Rank a corpus snapshot") 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import re
+import json
+import os
+import hashlib
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_taxonomy.json')
+
+# Tokens keep the characters that are part of technology names (c#, c++, .net, node.js),
+# a trailing '.' is sentence punctuation and never part of a token
+TOKEN_PATTERN = re.compile(r'\.?[a-z0-9+#](?:[a-z0-9+#.]*[a-z0-9+#])?')
+# Split point before each internal '.', e.g. c#.net -> c#, .net
+DOT_SPLIT_PATTERN = re.compile(r'(?<=.)(?=\.)')
+# Version suffix of a dotted compound, e.g. the .8 of python3.8
+VERSION_PART_PATTERN = re.compile(r'\.\d+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lowercased text into skill tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SkillTaxonomy:
+    """Canonical skills with aliases and weights, compiled into a phrase index.
+
+    Every canonical name and alias is tokenized the same way as resume text, and
+    the token sequence maps to the canonical skill. Matching walks the text once
+    and looks up the n-grams starting at each token, so "java" never matches inside
+    "javascript" and the cost does not grow with the number of skills.
+    """
+
+    def __init__(self, skills: Optional[List[Dict[str, Any]]] = None):
+        self.weights: Dict[str, float] = {}
+        self.phrases: Dict[Tuple[str, ...], str] = {}
+        self.first_tokens: Set[str] = set()
+        self.max_phrase_length = 0
+
+        for skill in skills or []:
+            name = skill['name'].lower()
+            self.weights[name] = float(skill.get('weight', 1.0))
+            for surface in [name] + [alias.lower() for alias in skill.get('aliases', [])]:
+                phrase = tuple(tokenize(surface))
+                if not phrase:
+                    continue
+                self.phrases[phrase] = name
+                self.first_tokens.add(phrase[0])
+                self.max_phrase_length = max(self.max_phrase_length, len(phrase))
+        
+        # Changes whenever matching or weights change, so persisted rankings can be invalidated
+        payload = json.dumps([sorted(self.weights.items()), sorted(map(list, self.phrases.items()))])
+        self.fingerprint = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TAXONOMY_PATH) -> 'SkillTaxonomy':
+        """Load a taxonomy file; an unreadable file gives an empty taxonomy"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f).get('skills', []))
+        except Exception as e:
+            print(f"Error loading skill taxonomy {path}: {e}")
+            return cls()
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def canonical(self, term: str) -> Optional[str]:
+        """Canonical skill for a skill name or alias, None if it is not in the taxonomy"""
+        return self.phrases.get(tuple(tokenize(term)))
+
+    def weight(self, term: str) -> float:
+        """Weight of a skill name or alias (1.0 if it is not in the taxonomy)"""
+        skill = self.canonical(term)
+        return self.weights[skill] if skill else 1.0
+
+    def find_skills(self, text: str) -> Set[str]:
+        """Canonical skills mentioned in text, in a single pass over its tokens"""
+        tokens = tokenize(text)
+        # A leading '.' only belongs to names such as .net, otherwise it is punctuation
+        tokens = [token[1:] if token[0] == '.' and token not in self.first_tokens else token
+                  for token in tokens]
+
+        found: Set[str] = set()
+        for i, token in enumerate(tokens):
+            if '.' in token[1:]:
+                self._match_dotted_parts(token, found)
+            if token not in self.first_tokens:
+                continue
+            for length in range(1, min(self.max_phrase_length, len(tokens) - i) + 1):
+                skill = self.phrases.get(tuple(tokens[i:i + length]))
+                if skill:
+                    found.add(skill)
+        return found
+
+    def _match_dotted_parts(self, token: str, found: Set[str]) -> None:
+        """Match the parts of a known dotted compound (c#.net, vb.net, asp.net, python3.8) on their own.
+
+        A token is only split when every part after the first is a dotted skill such as
+        .net or a version number, so no.sql, node.js and react.js are left whole.
+        """
+        head, *tail = DOT_SPLIT_PATTERN.split(token)
+        if not all((part,) in self.phrases or VERSION_PART_PATTERN.fullmatch(part) for part in tail):
+            return
+        for part in [head] + tail:
+            skill = self.phrases.get((part,))
+            if skill:
+                found.add(skill)
+
+
+@lru_cache(maxsize=None)
+def load_taxonomy(path: str = DEFAULT_TAXONOMY_PATH) -> SkillTaxonomy:
+    """Load and compile a taxonomy once per process"""
+    return SkillTaxonomy.load(path)